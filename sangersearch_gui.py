@@ -1,46 +1,132 @@
 import sys
 import os
+import functools
+import mmap
+import queue
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QPushButton, QLineEdit, QLabel, 
                             QFileDialog, QScrollArea, QFrame)
-from PyQt6.QtCore import Qt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-import matplotlib.pyplot as plt
+from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QFont, QPainterPath, QTransform
+import pyqtgraph as pg
 import numpy as np
-from Bio import SeqIO
-from Bio.Seq import Seq
-from Bio.SeqIO import AbiIO 
 
-def find_ab1_files(start_path):
-    # recursively find all .ab1 files starting from the given path
-    ab1_files = []
-    for root, dirs, files in os.walk(start_path):
-        for file in files:
-            if file.lower().endswith('.ab1'):
-                ab1_files.append(os.path.join(root, file))
-    return ab1_files
+# Complement table for reverse-complementing search patterns, including the
+# IUPAC ambiguity codes (as Bio.Seq does) so e.g. R pairs with Y
+_COMP_TABLE = bytes.maketrans(b'ACGTRYKMBVDHSWNacgtrykmbvdhswn',
+                              b'TGCAYRMKVBHDSWNtgcayrmkvbhdswn')
 
-def search_sequence(ab1_file, search_seq):
+# White background to match the rest of the UI; antialiasing off for fast redraws
+pg.setConfigOptions(background='w', foreground='k', antialias=False)
+
+def _disk_order(entry):
+    # Sort key approximating on-disk order within a directory, so files are read
+    # with fewer seeks on HDDs/network shares. scandir hands us the inode for free
+    # on POSIX; on Windows the inode needs an extra stat but the size doesn't.
+    if os.name == 'nt':
+        return entry.stat().st_size
+    return entry.inode()
+
+def _scan_dir(path):
+    # list a single directory, splitting it into .ab1 files and subdirectories
+    # (symlinked directories are not followed, matching os.walk)
+    ab1_entries, subdirs = [], []
     try:
-        # Read the AB1 file
-        record = SeqIO.read(ab1_file, "abi")
-        sequence = str(record.seq)
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        subdirs.append(entry.path)
+                elif entry.name[-4:].lower() == '.ab1':
+                    ab1_entries.append(entry)
+            ab1_entries.sort(key=_disk_order)
+    except OSError:
+        pass  # unreadable directory, skip it like os.walk does
+    return [entry.path for entry in ab1_entries], subdirs
+
+def find_ab1_files(start_path, max_workers=16):
+    # recursively find all .ab1 files starting from the given path, yielding each
+    # directory's files as soon as it has been listed so callers can start on them
+    # directories are listed in parallel as the walk is mostly waiting on the filesystem
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {pool.submit(_scan_dir, start_path)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirs = future.result()
+                pending.update(pool.submit(_scan_dir, subdir) for subdir in subdirs)
+                yield from files
+
+# A, C, G, T trace channels
+TRACE_CHANNELS = ('DATA9', 'DATA10', 'DATA11', 'DATA12')
+
+# One ABIF directory entry: tag name, tag number, element type, element size,
+# element count, data size, data offset (or the data itself if <= 4 bytes), handle
+_DIR_ENTRY = struct.Struct('>4sIHHIIII')
+
+def _read_abi_minimal(ab1_file, want=('PBAS2',) + TRACE_CHANNELS):
+    # Read only the requested tags (name + number, e.g. 'PBAS2', 'DATA9') from an
+    # AB1 file by walking the ABIF directory ourselves, rather than parsing every
+    # tag with SeqIO. The file is memory-mapped and parsed in place; 16-bit tags
+    # come back as int16 arrays, everything else as bytes.
+    with open(ab1_file, 'rb') as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm[:4] != b'ABIF':
+            raise ValueError("not an ABIF file")
+        # The header embeds the entry describing the directory itself at byte 6
+        _, _, _, _, dir_count, _, dir_offset, _ = _DIR_ENTRY.unpack_from(mm, 6)
+
+        # Index the directory entries we want: tag -> (elem_type, size, offset)
+        entries = {}
+        for i in range(dir_count):
+            entry_offset = dir_offset + i * _DIR_ENTRY.size
+            name, number, elem_type, _, _, data_size, data_offset, _ = _DIR_ENTRY.unpack_from(mm, entry_offset)
+            tag = f"{name.decode('latin-1')}{number}"
+            if tag in want:
+                if data_size <= 4:  # small values are stored in the offset field itself
+                    data_offset = entry_offset + 20
+                entries[tag] = (elem_type, data_size, data_offset)
+        missing = [tag for tag in want if tag not in entries]
+        if missing:
+            raise ValueError(f"missing ABIF tags: {', '.join(missing)}")
+
+        # Then pull just those tags' data out of the mapping
+        tags = {}
+        for tag, (elem_type, data_size, data_offset) in entries.items():
+            if elem_type == 4:  # big-endian signed shorts, e.g. the trace channels
+                # astype copies into native order, so nothing keeps the mapping alive
+                tags[tag] = np.frombuffer(mm, dtype='>i2', count=data_size // 2,
+                                          offset=data_offset).astype(np.int16)
+            else:
+                tags[tag] = mm[data_offset:data_offset + data_size]
+    return tags
+
+def _read_abi_basecalls(ab1_file):
+    # Just the base calls (PBAS2 tag), all the search pass needs
+    return _read_abi_minimal(ab1_file, ('PBAS2',))['PBAS2']
+
+@functools.lru_cache(maxsize=64)
+def _load_abi(ab1_file):
+    # Load an AB1 file's base calls + the four trace channels (stacked into one
+    # 4 x N array) only when a result is clicked, and cache them so a result
+    # that is clicked again isn't re-read
+    tags = _read_abi_minimal(ab1_file, ('PBAS2',) + TRACE_CHANNELS)
+    return tags['PBAS2'], np.stack([tags[c] for c in TRACE_CHANNELS])
+
+def search_sequence(ab1_file, forward_seq, rev_comp_seq):
+    # forward_seq and rev_comp_seq are uppercase bytes, prepared once per search
+    try:
+        # Read the base calls from the AB1 file
+        sequence = _read_abi_basecalls(ab1_file).upper()
         
         # Search for seq in both forward and reverse complement
-        search_seq = search_seq.upper()
-        sequence = sequence.upper()
-        
-        # Create rev comp to search that too
-        rev_comp = str(Seq(search_seq).reverse_complement())
-        
-        # Get the position of the match
-        forward_pos = sequence.find(search_seq)
-        reverse_pos = sequence.find(rev_comp)
-        
+        forward_pos = sequence.find(forward_seq)
         if forward_pos != -1:
             return True, "forward", forward_pos
-        elif reverse_pos != -1:
+        reverse_pos = sequence.find(rev_comp_seq)
+        if reverse_pos != -1:
             return True, "reverse complement", reverse_pos
         return False, None, None
     
@@ -48,67 +134,100 @@ def search_sequence(ab1_file, search_seq):
         print(f"Error reading {ab1_file}: {str(e)}")
         return False, None, None
 
-def plot_trace_section(ab1_file, match_position, sequence_length, orientation, search_seq):
-    # Read the trace data
-    record = SeqIO.read(ab1_file, "abi")
+@functools.lru_cache(maxsize=None)
+def _base_symbol(base, bold=False):
+    # Turn a base letter into a centred, unit-sized path usable as a scatter symbol
+    font = QFont()
+    font.setBold(bold)
+    path = QPainterPath()
+    path.addText(0, 0, font, base)
+    bounds = path.boundingRect()
+    scale = 1.0 / max(bounds.width(), bounds.height())
+    transform = QTransform()
+    transform.scale(scale, scale)
+    transform.translate(-bounds.x() - bounds.width() / 2, -bounds.y() - bounds.height() / 2)
+    return transform.map(path)
+
+def plot_trace_section(ab1_file, match_position, sequence_length, orientation, search_seq, record=None):
+    # Use the (base calls, traces) record the caller already holds, otherwise
+    # read the trace data (cached, so re-clicking a result is instant)
+    sequence, traces = record if record is not None else _load_abi(ab1_file)
     
-    # Get trace data from annotations
-    channels = ['DATA9', 'DATA10', 'DATA11', 'DATA12']  # A, C, G, T channels
     colors = ['green', 'blue', 'black', 'red'] 
     base_labels = ['A', 'C', 'G', 'T']
-    traces = [record.annotations['abif_raw'][c] for c in channels]
     
     # Calculate the region to display either side of match 
     padding = 20  # bases before and after
-    bases_per_point = len(traces[0]) / len(record.seq)
+    bases_per_point = traces.shape[1] / len(sequence)
     start_point = int((match_position - padding) * bases_per_point)
     end_point = int((match_position + sequence_length + padding) * bases_per_point)
     
     # Ensure we don't go out of bounds
     start_point = max(0, start_point)
-    end_point = min(len(traces[0]), end_point)
+    end_point = min(traces.shape[1], end_point)
+    window = traces[:, start_point:end_point]  # view, no per-channel copies
     
-    # Create the plot
-    fig = Figure(figsize=(15, 5))
-    ax = fig.add_subplot(111)
+    # Create the plot; for wide windows, decimate each trace to its min/max per
+    # screen pixel ('peak' mode) so rendering cost stays bounded by the plot width
+    plot_widget = pg.PlotWidget()
+    plot_widget.setDownsampling(auto=True, mode='peak')
+    plot_widget.setClipToView(True)
     
     # Calculate sequence positions for x-axis
     seq_positions = np.linspace(match_position - padding, 
                               match_position + sequence_length + padding,
                               end_point - start_point)
     
-    # Plot traces with labels for legend
-    for trace, color, base in zip(traces, colors, base_labels):
-        ax.plot(seq_positions, trace[start_point:end_point], color=color, alpha=0.5, label=base)
+    # Plot traces, one pen per base channel
+    for trace, color, base in zip(window, colors, base_labels):
+        pen_color = QColor(color)
+        pen_color.setAlphaF(0.5)
+        plot_widget.plot(seq_positions, trace, pen=pen_color, name=base)
     
     # Highlight the matching region w/ yellow
-    ax.axvspan(match_position, match_position + sequence_length, 
-               color='yellow', alpha=0.3)
+    highlight = pg.LinearRegionItem([match_position, match_position + sequence_length],
+                                    brush=(255, 255, 0, 76), pen=pg.mkPen(None), movable=False)
+    plot_widget.addItem(highlight)
     
-    max_height = max(max(trace[start_point:end_point]) for trace in traces)
-    for i in range(match_position - padding, match_position + sequence_length + padding):
-        if 0 <= i < len(record.seq):
-            base = record.seq[i]
-            if base not in 'ACGT':  # check for ambiguous bases and label purple
-                ax.text(i, max_height * 1.05, base, 
-                       fontsize=8, ha='center', va='bottom',
-                       color='purple', fontweight='bold')
-            else:
-                ax.text(i, max_height * 1.05, base,
-                       fontsize=8, ha='center', va='bottom')
+    max_height = int(window.max())
+    
+    # Label the bases as glyph symbols, one scatter item per distinct letter
+    # (all points share a symbol and brush) instead of one text item per base
+    first = max(0, match_position - padding)
+    last = min(len(sequence), match_position + sequence_length + padding)
+    bases = np.frombuffer(sequence[first:last], dtype=np.uint8)
+    positions = np.arange(first, last)
+    for letter in np.unique(bases):
+        ambiguous = letter not in b'ACGT'  # check for ambiguous bases and label purple
+        mask = bases == letter
+        plot_widget.addItem(pg.ScatterPlotItem(
+            x=positions[mask], y=np.full(np.count_nonzero(mask), max_height * 1.08),
+            symbol=_base_symbol(chr(letter), ambiguous), brush=pg.mkBrush('purple' if ambiguous else 'k'),
+            pen=pg.mkPen(None), size=11))
     
     # Add labels
-    ax.set_title(f"Trace View - {os.path.basename(ab1_file)}\n"
-                 f"Search Sequence: {search_seq} ({orientation})\n"
-                 f"Path: {ab1_file}", pad=20)
-    ax.set_xlabel("Sequence Position")
-    ax.set_ylabel("Signal Intensity")
+    plot_widget.setTitle(f"Trace View - {os.path.basename(ab1_file)}<br>"
+                         f"Search Sequence: {search_seq} ({orientation})<br>"
+                         f"Path: {ab1_file}")
+    # pyqtgraph fixes the title row at one line high, so size it to fit all three
+    plot_item = plot_widget.getPlotItem()
+    title_height = plot_item.titleLabel.item.boundingRect().height()
+    plot_item.titleLabel.setMaximumHeight(title_height)
+    plot_item.layout.setRowFixedHeight(0, title_height)
+    plot_widget.setLabel('bottom', "Sequence Position")
+    plot_widget.setLabel('left', "Signal Intensity")
     
-    fig.tight_layout()
+    # Text items don't count towards auto-range, so leave headroom for the bases
+    plot_widget.setXRange(match_position - padding, match_position + sequence_length + padding, padding=0)
+    plot_widget.setYRange(0, max_height * 1.15, padding=0)
     
-    return fig
+    return plot_widget
 
 class SequenceFinderWindow(QMainWindow):
+    # Emitted from the search thread; Qt delivers them on the UI thread
+    hitFound = pyqtSignal(str, str, int)
+    searchFinished = pyqtSignal()
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("SangerSearch: .ab1 Sequence Finder")
@@ -246,6 +365,9 @@ class SequenceFinderWindow(QMainWindow):
         
         self.current_directory = None
         self.found_files = []
+        
+        self.hitFound.connect(self.add_found_file)
+        self.searchFinished.connect(self.finish_search)
 
     def select_directory(self):
         directory = QFileDialog.getExistingDirectory(self, "Select Directory")
@@ -273,18 +395,58 @@ class SequenceFinderWindow(QMainWindow):
         # Show searching status
         self.status_label.setText("Searching...")
         self.status_label.setStyleSheet("color: #1976D2;")  # Blue color for info
-        QApplication.processEvents()  # Update the UI
-        
-        # Find files
-        ab1_files = find_ab1_files(self.current_directory)
         self.found_files = []
         
-        for file in ab1_files:
-            found, orientation, position = search_sequence(file, self.sequence_input.text())
+        # Build the forward and reverse complement patterns once for all files
+        search_seq = self.sequence_input.text().upper()
+        forward_seq = search_seq.encode()
+        rev_comp_seq = forward_seq.translate(_COMP_TABLE)[::-1]
+        
+        # Scan in the background; hits stream back through hitFound so the list
+        # fills in while the search is still running
+        self.search_button.setEnabled(False)
+        threading.Thread(target=self._run_search,
+                         args=(self.current_directory, forward_seq, rev_comp_seq),
+                         daemon=True).start()
+
+    def _run_search(self, directory, forward_seq, rev_comp_seq):
+        # Runs off the UI thread, so only talk to the window through signals.
+        # The walk feeds a bounded queue that a pool of search workers drains, so
+        # files are searched while discovery is still going.
+        try:
+            worker_count = os.cpu_count() or 4
+            ab1_queue = queue.Queue(maxsize=1024)
+            with ThreadPoolExecutor(max_workers=worker_count) as pool:
+                for _ in range(worker_count):
+                    pool.submit(self._search_worker, ab1_queue, forward_seq, rev_comp_seq)
+                try:
+                    for file in find_ab1_files(directory):
+                        ab1_queue.put(file)
+                finally:
+                    for _ in range(worker_count):
+                        ab1_queue.put(None)  # one stop marker per worker
+        finally:
+            self.searchFinished.emit()
+
+    def _search_worker(self, ab1_queue, forward_seq, rev_comp_seq):
+        # Search queued files until the stop marker arrives
+        while True:
+            file = ab1_queue.get()
+            if file is None:
+                return
+            found, orientation, position = search_sequence(file, forward_seq, rev_comp_seq)
             if found:
-                self.found_files.append((file, orientation, position))
-                self.add_result_item(file, orientation)
+                self.hitFound.emit(file, orientation, position)
+
+    def add_found_file(self, file_path, orientation, position):
+        # Trace data is loaded on first click and kept in the last slot
+        self.found_files.append((file_path, orientation, position, None))
+        self.add_result_item(file_path, orientation)
+        self.status_label.setText(f"Searching... found in {len(self.found_files)} files so far")
 
+    def finish_search(self):
+        self.search_button.setEnabled(True)
+        
         # Update status with results
         if self.found_files:
             self.status_label.setText(f"Found sequence in {len(self.found_files)} files")
@@ -293,9 +455,6 @@ class SequenceFinderWindow(QMainWindow):
             self.status_label.setText("Sequence not found in any files")
             self.status_label.setStyleSheet("color: #d32f2f;")
 
-        # After adding all results, ensure there's a stretch at the bottom
-        self.files_list_layout.addStretch()
-
     def add_result_item(self, file_path, orientation):
         # Create a frame to hold the result
         result_frame = QFrame()
@@ -337,7 +496,8 @@ class SequenceFinderWindow(QMainWindow):
         # Make the frame clickable
         result_frame.mousePressEvent = lambda e: self.show_trace(file_path, orientation)
         
-        self.files_list_layout.addWidget(result_frame)
+        # Insert above the stretch so results stay packed at the top
+        self.files_list_layout.insertWidget(self.files_list_layout.count() - 1, result_frame)
 
     def show_trace(self, file_path, orientation):
         try:
@@ -345,16 +505,20 @@ class SequenceFinderWindow(QMainWindow):
             for i in reversed(range(self.trace_layout.count())): 
                 self.trace_layout.itemAt(i).widget().setParent(None)
                 
-            # Find the position for this file
-            file_info = next(f for f in self.found_files if f[0] == file_path)
+            # Find the position (and any already loaded trace data) for this file
+            index, file_info = next((i, f) for i, f in enumerate(self.found_files) if f[0] == file_path)
+            record = file_info[3]
+            if record is None:
+                record = _load_abi(file_path)
+                self.found_files[index] = file_info[:3] + (record,)
             
             # Create new trace
-            fig = plot_trace_section(file_path, file_info[2], 
-                                   len(self.sequence_input.text()),
-                                   orientation, self.sequence_input.text())
+            plot_widget = plot_trace_section(file_path, file_info[2], 
+                                             len(self.sequence_input.text()),
+                                             orientation, self.sequence_input.text(),
+                                             record)
             
-            canvas = FigureCanvas(fig)
-            self.trace_layout.addWidget(canvas)
+            self.trace_layout.addWidget(plot_widget)
         except Exception as e:
             self.status_label.setText(f"Error displaying trace: {str(e)}")
             self.status_label.setStyleSheet("color: #d32f2f;")